@@ -44,6 +44,7 @@ def simulate_game(ai_model_class, num_hands=50):
 
             player = game.players[p_idx]
             state = game.get_game_state()
+            state["self_index"] = p_idx
 
             # Choose which AI acts
             if player.name == "AI_Bot":
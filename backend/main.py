@@ -3,13 +3,16 @@ from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from uuid import uuid4
-from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
 import asyncio
 from poker_engine.monte_carlo_ai import MonteCarloAI
 from fastapi import Body
 import random
+import logging
 from poker_engine.poker_engine_api import PokerGame
-from ws_manager import ConnectionManager
+from ws_manager import ConnectionManager, WIRE_FORMATS
+
+logger = logging.getLogger(__name__)
 
 manager = ConnectionManager()
 
@@ -26,7 +29,7 @@ app.add_middleware(
 games = {}
 locks = {}
 lobby_timers = {}
-executor = ProcessPoolExecutor(max_workers=2)
+executor = ThreadPoolExecutor(max_workers=4)
 
 LOBBY_DURATION = 15
 MIN_PLAYERS = 2
@@ -71,7 +74,13 @@ async def lobby_countdown(game_id: str):
             game.lobby_timer = remaining
             game.game_starting = remaining <= 5 and remaining > 0
             
-            await manager.broadcast(game_id, game)
+            # Seat and stage changes are broadcast in full where they happen;
+            # a tick only carries the countdown
+            await manager.broadcast_raw(game_id, {
+                "type": "lobby_tick",
+                "timer": remaining,
+                "game_starting": game.game_starting
+            })
             
             if remaining == 0:
                 break
@@ -83,7 +92,7 @@ async def lobby_countdown(game_id: str):
     except asyncio.CancelledError:
         pass
     except Exception as e:
-        print(f"Lobby timer error for game {game_id}: {e}")
+        logger.warning("Lobby timer error for game %s: %s", game_id, e)
 
 async def check_and_start_game(game_id: str):
     """Check if game can start and begin if conditions are met"""
@@ -92,25 +101,32 @@ async def check_and_start_game(game_id: str):
         return
 
     async with locks[game_id]:
-        active_players = sum(1 for p in game.players if getattr(p, "name", "") and getattr(p, "name", "") != "")
+        active_players = get_active_player_count(game)
         
         if active_players >= MIN_PLAYERS:
-            print(f"Starting game {game_id} with {active_players} players")
+            logger.info("Starting game %s with %s players", game_id, active_players)
             game.stage = "preflop"
             game.lobby_timer = None
             game.game_starting = False
             
             game.play_hand()
-            await manager.broadcast(game_id, game)
+            started = True
         else:
-            print(f"Not enough players for game {game_id} ({active_players}/{MIN_PLAYERS})")
+            logger.info("Not enough players for game %s (%s/%s)", game_id, active_players, MIN_PLAYERS)
             game.lobby_timer = LOBBY_DURATION
-            await manager.broadcast(game_id, game)
-            await start_lobby_timer(game_id)
+            started = False
+
+    await manager.broadcast(game_id, game)
+    if not started:
+        await start_lobby_timer(game_id)
+
+def _is_seated(player) -> bool:
+    """A seat is taken when its player has a non-empty name"""
+    return bool(getattr(player, "name", ""))
 
 def get_active_player_count(game: PokerGame) -> int:
     """Count how many players are actively seated"""
-    return sum(1 for p in game.players if getattr(p, "name", "") and getattr(p, "name", "") != "")
+    return sum(map(_is_seated, game.players))
 
 # --- Routes ---
 @app.post("/create_game")
@@ -127,11 +143,13 @@ async def create_game(req: CreateGameRequest):
     game.stage = "lobby"
     game.lobby_timer = LOBBY_DURATION
     game.game_starting = False
+    game.ai_cache = {}  # seat index -> MonteCarloAI
+    game.ai_running = False  # True while an /action request drives bot turns
 
     for i, p in enumerate(game.players):
         if p.name == "Bot":
             p.is_bot = True
-            print(f"Added Bot to seat {i}")
+            logger.info("Added Bot to seat %s", i)
 
     games[game_id] = game
     locks[game_id] = asyncio.Lock()
@@ -158,7 +176,7 @@ async def add_ai_player(game_id: str, payload: dict = Body(...)):
             raise HTTPException(status_code=400, detail="Invalid seat index")
 
         existing = game.players[seat_index]
-        if existing.name and existing.name != "":
+        if _is_seated(existing):
             raise HTTPException(status_code=409, detail="Seat already taken")
 
         existing.name = ai_name
@@ -169,10 +187,14 @@ async def add_ai_player(game_id: str, payload: dict = Body(...)):
             existing.chips = 1000
         existing.hand = []
 
-        await start_lobby_timer(game_id)
-        await manager.broadcast(game_id, game)
+        state = game.get_game_state()
+
+    await start_lobby_timer(game_id)
+    # Seat changes often arrive in bursts (several players or bots sitting
+    # down together), so they are merged into one broadcast
+    manager.schedule_broadcast(game_id, game)
 
-    return {"success": True, "state": game.get_game_state()}
+    return {"success": True, "state": state}
 
 @app.post("/start_hand/{game_id}")
 async def start_hand(game_id: str):
@@ -196,9 +218,11 @@ async def start_hand(game_id: str):
             game.game_starting = False
         
         game.play_hand()
-        await manager.broadcast(game_id, game)
+        state = game.get_game_state()
 
-        return {"message": "New hand started", "state": game.get_game_state()}
+    await manager.broadcast(game_id, game)
+
+    return {"message": "New hand started", "state": state}
 
 @app.post("/join_seat/{game_id}")
 async def join_seat(game_id: str, payload: JoinSeatRequest):
@@ -221,7 +245,7 @@ async def join_seat(game_id: str, payload: JoinSeatRequest):
             raise HTTPException(status_code=400, detail="Invalid seat index")
 
         existing = game.players[seat_index]
-        if getattr(existing, "name", "") and getattr(existing, "name", "") != "":
+        if _is_seated(existing):
             raise HTTPException(status_code=409, detail="Seat already taken")
 
         existing.name = player_name
@@ -232,10 +256,12 @@ async def join_seat(game_id: str, payload: JoinSeatRequest):
             existing.chips = 1000
         existing.hand = []
 
-        await start_lobby_timer(game_id)
-        await manager.broadcast(game_id, game)
+        state = game.get_game_state()
+
+    await start_lobby_timer(game_id)
+    manager.schedule_broadcast(game_id, game)
 
-    return {"success": True, "state": game.get_game_state()}
+    return {"success": True, "state": state}
 
 @app.post("/leave_seat/{game_id}")
 async def leave_seat(game_id: str, payload: LeaveSeatRequest):
@@ -254,9 +280,7 @@ async def leave_seat(game_id: str, payload: LeaveSeatRequest):
             raise HTTPException(status_code=400, detail="Invalid seat index")
 
         player = game.players[seat_index]
-        player_name = getattr(player, "name", "")
-        
-        if not player_name or player_name == "":
+        if not _is_seated(player):
             raise HTTPException(status_code=400, detail="Seat is already empty")
 
         player.name = ""
@@ -265,10 +289,81 @@ async def leave_seat(game_id: str, payload: LeaveSeatRequest):
         player.current_bet = 0
         player.hand = []
 
-        await start_lobby_timer(game_id)
+        state = game.get_game_state()
+
+    await start_lobby_timer(game_id)
+    manager.schedule_broadcast(game_id, game)
+
+    return {"success": True, "state": state}
+
+async def run_ai_turns(game_id: str, game, result):
+    """Play bot turns until a human is to act; returns the last result and action messages"""
+    messages = []
+    ai_iterations = 0
+    max_ai_iterations = 20
+    
+    while ai_iterations < max_ai_iterations:
+        async with locks[game_id]:
+            if (
+                game.game_over
+                or game.current_player_index is None
+                or not getattr(game.players[game.current_player_index], "is_bot", False)
+            ):
+                break
+
+            ai_iterations += 1
+            ai_index = game.current_player_index
+            ai_name = game.players[ai_index].name
+
+            logger.debug("[AI TURN] %s (iteration %s)", ai_name, ai_iterations)
+
+            ai_state = game.get_game_state()
+            ai_state["self_index"] = ai_index
+            loop = asyncio.get_running_loop()
+
+            ai_player = game.ai_cache.get(ai_index)
+            if ai_player is None or ai_player.name != ai_name:
+                ai_player = MonteCarloAI(name=ai_name, simulations=200)
+                game.ai_cache[ai_index] = ai_player
+
+            # Start deciding now so the Monte Carlo run overlaps the think time
+            decision = loop.run_in_executor(executor, ai_player.decide, ai_state)
+            turn = game.turn
+
+        # The lock is free while the bot "thinks", so state reads and other
+        # requests are not blocked by the animation delay
+        think_time = random.uniform(1, 2)
+        await asyncio.sleep(think_time)
+
+        try:
+            ai_decision = await decision
+            logger.debug("[AI DECISION] %s: %s", ai_name, ai_decision)
+        except Exception as e:
+            logger.warning("[AI ERROR] %s failed to decide: %s", ai_name, e)
+            ai_decision = {"move": "fold", "raise_amount": 0}
+
+        move = ai_decision["move"]
+        amt = ai_decision.get("raise_amount", 0)
+
+        async with locks[game_id]:
+            if game.turn != turn:
+                # The game moved on while this bot was thinking (e.g. a new
+                # hand started), so the decision is stale
+                continue
+
+            logger.debug("[AI ACTION] %s chooses %s %s after %.1fs", ai_name, move, amt if amt else '', think_time)
+            messages.append(f"{ai_name} waited {think_time:.1f}s → {move} {amt if amt else ''}")
+
+            result = game.execute_action(ai_index, move, amt)
+            logger.debug("[AI ACTION RESULT] %s", result)
+
+        # Bot moves are paced by the think time, so each goes out right away
         await manager.broadcast(game_id, game)
 
-    return {"success": True, "state": game.get_game_state()}
+    if ai_iterations >= max_ai_iterations:
+        logger.warning("AI loop hit max iterations limit!")
+
+    return result, messages
 
 @app.post("/action/{game_id}")
 async def player_action(game_id: str, data: dict = Body(...)):
@@ -277,71 +372,39 @@ async def player_action(game_id: str, data: dict = Body(...)):
     if not game:
         raise HTTPException(status_code=404, detail="Game not found")
 
-    if getattr(game, 'stage', '') == 'lobby':
-        raise HTTPException(status_code=400, detail="Game is in lobby phase - cannot perform actions")
-
     async with locks[game_id]:
+        if getattr(game, 'stage', '') == 'lobby':
+            raise HTTPException(status_code=400, detail="Game is in lobby phase - cannot perform actions")
+
         player_index = data["player_index"]
         action = data["action"]
         raise_amount = data.get("raise_amount", 0)
 
-        print(f"[ACTION] Player {player_index} ({game.players[player_index].name}) action: {action} {raise_amount}")
+        logger.debug("[ACTION] Player %s (%s) action: %s %s", player_index, game.players[player_index].name, action, raise_amount)
 
         result = game.execute_action(player_index, action, raise_amount)
-        print(f"[ACTION RESULT] {result}")
-        
-        state = game.get_game_state()
-        await manager.broadcast(game_id, game)
+        logger.debug("[ACTION RESULT] %s", result)
 
         messages = [f"{game.players[player_index].name} chose {action} {raise_amount if raise_amount else ''}".strip()]
 
-        # AI turn loop
-        ai_iterations = 0
-        max_ai_iterations = 20
-        
-        while (
-            not game.game_over
-            and game.current_player_index is not None
-            and getattr(game.players[game.current_player_index], "is_bot", False)
-            and ai_iterations < max_ai_iterations
-        ):
-            ai_iterations += 1
-            ai_player_obj = game.players[game.current_player_index]
-            ai_name = ai_player_obj.name
-
-            print(f"[AI TURN] {ai_name} (iteration {ai_iterations})")
-
-            think_time = random.uniform(1, 2)
-            await asyncio.sleep(think_time)
-
-            ai_state = game.get_game_state()
-            loop = asyncio.get_event_loop()
+        # Only one request drives bot turns at a time; any other just reports its own action
+        drive_ai = not game.ai_running
+        game.ai_running = True
 
-            ai_player = MonteCarloAI(name=ai_name, simulations=200)
-            
-            try:
-                ai_decision = await loop.run_in_executor(executor, ai_player.decide, ai_state)
-                print(f"[AI DECISION] {ai_name}: {ai_decision}")
-            except Exception as e:
-                print(f"[AI ERROR] {ai_name} failed to decide: {e}")
-                ai_decision = {"move": "fold", "raise_amount": 0}
-
-            move = ai_decision["move"]
-            amt = ai_decision.get("raise_amount", 0)
-
-            print(f"[AI ACTION] {ai_name} chooses {move} {amt if amt else ''} after {think_time:.1f}s")
-            messages.append(f"{ai_name} waited {think_time:.1f}s → {move} {amt if amt else ''}")
-
-            result = game.execute_action(game.current_player_index, move, amt)
-            print(f"[AI ACTION RESULT] {result}")
-            
-            state = game.get_game_state()
-            await manager.broadcast(game_id, game)
+    # Everything after claiming the AI loop runs under the try, so a failing
+    # broadcast cannot leave ai_running set and stall the bots for good
+    try:
+        await manager.broadcast(game_id, game)
 
-        if ai_iterations >= max_ai_iterations:
-            print(f"[WARNING] AI loop hit max iterations limit!")
+        if drive_ai:
+            result, ai_messages = await run_ai_turns(game_id, game, result)
+            messages.extend(ai_messages)
+    finally:
+        if drive_ai:
+            game.ai_running = False
 
-        return {"result": result, "state": state, "messages": messages}
+    state = game.get_game_state()
+    return {"result": result, "state": state, "messages": messages}
 
 @app.get("/state/{game_id}")
 async def get_state(game_id: str):
@@ -357,22 +420,32 @@ async def websocket_endpoint(websocket: WebSocket, game_id: str):
     """
     Single WebSocket connection that handles both spectators and players.
     Clients upgrade from spectator to player via WebSocket messages.
+    Connect with ?wire=msgpack to receive msgpack binary frames instead of
+    JSON text (falls back to JSON if msgpack is not installed). With the JSON
+    wire, ?compress=deflate sends spectator broadcasts zlib-compressed in
+    binary frames, so every binary frame is compressed JSON; compress is
+    ignored for msgpack, whose binary frames are always plain msgpack.
     """
+    wire = websocket.query_params.get("wire", "json")
+    if wire not in WIRE_FORMATS:
+        wire = "json"
+    compress = wire == "json" and websocket.query_params.get("compress") == "deflate"
+
     # Connect as spectator initially
-    conn_state = await manager.connect(game_id, websocket)
-    print(f"[WS CONNECT] game={game_id} conn_id={conn_state.connection_id} role=spectator")
+    conn_state = await manager.connect(game_id, websocket, compress=compress, wire=wire)
+    logger.debug("[WS CONNECT] game=%s conn_id=%s role=spectator", game_id, conn_state.connection_id)
 
     game = games.get(game_id)
     if game:
         try:
             # Send initial state as spectator (no private cards visible)
-            await websocket.send_json({
+            await manager.send_personal_message(websocket, {
                 "type": "state_update",
                 "state": game.get_game_state(viewer_name=None)
             })
-            print(f"[WS INIT STATE SENT] to={conn_state.connection_id} as spectator")
+            logger.debug("[WS INIT STATE SENT] to=%s as spectator", conn_state.connection_id)
         except Exception as e:
-            print(f"[WS INIT ERROR] to={conn_state.connection_id}: {e}")
+            logger.warning("[WS INIT ERROR] to=%s: %s", conn_state.connection_id, e)
 
     try:
         while True:
@@ -385,7 +458,7 @@ async def websocket_endpoint(websocket: WebSocket, game_id: str):
                 player_name = data.get("player_name")
                 seat_index = data.get("seat_index")
                 
-                print(f"[WS] Connection {conn_state.connection_id} requesting upgrade to player: {player_name} seat {seat_index}")
+                logger.debug("[WS] Connection %s requesting upgrade to player: %s seat %s", conn_state.connection_id, player_name, seat_index)
                 
                 # Upgrade the connection
                 success = manager.upgrade_connection_to_player(websocket, player_name, seat_index)
@@ -394,39 +467,41 @@ async def websocket_endpoint(websocket: WebSocket, game_id: str):
                     # Send updated state with private cards visible
                     if game:
                         personalized_state = game.get_game_state(viewer_name=player_name)
-                        await websocket.send_json({
+                        await manager.send_personal_message(websocket, {
                             "type": "upgrade_success",
                             "state": personalized_state
                         })
-                        print(f"[WS] Upgrade successful for {player_name}")
+                        logger.debug("[WS] Upgrade successful for %s", player_name)
                 else:
-                    await websocket.send_json({
+                    await manager.send_personal_message(websocket, {
                         "type": "upgrade_failed",
                         "error": "Could not upgrade to player"
                     })
                     
             elif msg_type == "downgrade_to_spectator":
                 # Player wants to become spectator again
-                print(f"[WS] Player {conn_state.player_name} requesting downgrade to spectator")
+                logger.debug("[WS] Player %s requesting downgrade to spectator", conn_state.player_name)
                 manager.downgrade_connection_to_spectator(websocket)
                 
                 # Send state without private cards
                 if game:
-                    await websocket.send_json({
+                    await manager.send_personal_message(websocket, {
                         "type": "state_update",
                         "state": game.get_game_state(viewer_name=None)
                     })
             
             elif msg_type == "ping":
                 # Heartbeat
-                await websocket.send_json({"type": "pong"})
+                await manager.send_personal_message(websocket, {"type": "pong"})
             
             else:
-                print(f"[WS] Unknown message type: {msg_type}")
+                logger.warning("[WS] Unknown message type: %s", msg_type)
                 
     except WebSocketDisconnect:
+        logger.debug("[WS DISCONNECT] game=%s conn_id=%s", game_id, conn_state.connection_id)
+    finally:
+        # Also covers bad client data or a socket the manager already closed
         manager.disconnect(game_id, websocket)
-        print(f"[WS DISCONNECT] game={game_id} conn_id={conn_state.connection_id}")
 
 @app.delete("/game/{game_id}")
 async def cleanup_game(game_id: str):
@@ -438,4 +513,11 @@ async def cleanup_game(game_id: str):
         del games[game_id]
         if game_id in locks:
             del locks[game_id]
-    return {"message": "Game cleaned up"}
\ No newline at end of file
+    return {"message": "Game cleaned up"}
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # Equivalent to: uvicorn main:app --loop uvloop --http httptools
+    uvicorn.run("main:app", port=8000, loop="uvloop", http="httptools")
@@ -0,0 +1,163 @@
+import numpy as np
+from numba import njit
+
+from poker_engine.card import Deck
+
+# Cards are encoded as uint8 ids: rank_index * 4 + suit_index, using the
+# same rank/suit ordering as Deck (rank_index 0 is '2', 12 is 'A').
+RANK_INDEX = {r: i for i, r in enumerate(Deck.ranks)}
+SUIT_INDEX = {s: i for i, s in enumerate(Deck.suits)}
+ALL_CARDS = np.arange(52, dtype=np.uint8)
+
+# Scores pack the hand category into the high bits and up to five kicker
+# values (2..14) into 4-bit nibbles below it, so comparing two scores gives
+# the same ordering as comparing the tuples returned by eval_hand().
+_CATEGORY_SHIFT = 20
+
+
+def card_id(card):
+    """Encode a Card or a card string like '10h' as a uint8 card id"""
+    if isinstance(card, str):
+        rank, suit = card[:-1], card[-1]
+    else:
+        rank, suit = card.rank, card.suit
+    return RANK_INDEX[rank] * 4 + SUIT_INDEX[suit]
+
+
+def _build_tables():
+    top_bit = np.zeros(8192, dtype=np.int32)
+    packed = np.zeros(8192, dtype=np.int32)
+    straight = np.zeros(8192, dtype=np.int32)
+    popcount = np.zeros(8192, dtype=np.int32)
+
+    for mask in range(1, 8192):
+        ranks = [i for i in range(12, -1, -1) if mask & (1 << i)]
+        top_bit[mask] = 1 << ranks[0]
+        popcount[mask] = len(ranks)
+        for pos, r in enumerate(ranks[:5]):
+            packed[mask] |= (r + 2) << (4 * (4 - pos))
+
+        for high in range(12, 3, -1):
+            window = 0x1F << (high - 4)
+            if mask & window == window:
+                straight[mask] = high + 2
+                break
+        else:
+            wheel = (1 << 12) | 0xF
+            if mask & wheel == wheel:
+                straight[mask] = 5
+
+    return top_bit, packed, straight, popcount
+
+
+TOP_BIT, PACKED, STRAIGHT_HIGH, POPCOUNT = _build_tables()
+
+
+@njit(nogil=True, cache=True)
+def _top(mask, n):
+    """Packed values of the n highest ranks in mask, right-aligned"""
+    return PACKED[mask] >> (4 * (5 - n))
+
+
+@njit(nogil=True, cache=True)
+def eval7(cards):
+    """
+    Score a 7-card hand given as an array of card ids.
+    A higher score is a better hand.
+    """
+    rank_counts = np.zeros(13, dtype=np.int32)
+    suit_masks = np.zeros(4, dtype=np.int32)
+    for c in cards:
+        rank_counts[c >> 2] += 1
+        suit_masks[c & 3] |= 1 << (c >> 2)
+
+    m_any = m4 = m3 = m2 = 0
+    for r in range(13):
+        count = rank_counts[r]
+        if count:
+            m_any |= 1 << r
+        if count == 4:
+            m4 |= 1 << r
+        elif count == 3:
+            m3 |= 1 << r
+        elif count == 2:
+            m2 |= 1 << r
+
+    m_flush = 0
+    for s in range(4):
+        if POPCOUNT[suit_masks[s]] >= 5:
+            m_flush = suit_masks[s]
+
+    if m_flush and STRAIGHT_HIGH[m_flush]:
+        return (9 << _CATEGORY_SHIFT) | (STRAIGHT_HIGH[m_flush] << 16)
+
+    if m4:
+        quad_bit = TOP_BIT[m4]
+        return (8 << _CATEGORY_SHIFT) | (_top(quad_bit, 1) << 16) | (_top(m_any & ~quad_bit, 1) << 12)
+
+    if m3:
+        trip_bit = TOP_BIT[m3]
+        pair_or_trip = (m3 & ~trip_bit) | m2
+        if pair_or_trip:
+            return (7 << _CATEGORY_SHIFT) | (_top(trip_bit, 1) << 16) | (_top(pair_or_trip, 1) << 12)
+
+    if m_flush:
+        return (6 << _CATEGORY_SHIFT) | PACKED[m_flush]
+
+    if STRAIGHT_HIGH[m_any]:
+        return (5 << _CATEGORY_SHIFT) | (STRAIGHT_HIGH[m_any] << 16)
+
+    if m3:
+        trip_bit = TOP_BIT[m3]
+        return (4 << _CATEGORY_SHIFT) | (_top(trip_bit, 1) << 16) | (_top(m_any & ~trip_bit, 2) << 8)
+
+    if POPCOUNT[m2] >= 2:
+        top_pairs = TOP_BIT[m2] | TOP_BIT[m2 & ~TOP_BIT[m2]]
+        return (3 << _CATEGORY_SHIFT) | (_top(top_pairs, 2) << 12) | (_top(m_any & ~top_pairs, 1) << 8)
+
+    if m2:
+        return (2 << _CATEGORY_SHIFT) | (_top(m2, 1) << 16) | (_top(m_any & ~m2, 3) << 4)
+
+    return (1 << _CATEGORY_SHIFT) | PACKED[m_any]
+
+
+@njit(nogil=True, cache=True)
+def count_wins(hand, community, pool, uniforms, opponents):
+    """
+    Count simulations where hand wins or ties against every opponent.
+    Each simulation completes the board and then deals two cards per opponent
+    from pool, sampling only the cards it needs with a partial Fisher-Yates
+    shuffle driven by one row of uniforms (floats in [0, 1)).
+    """
+    sims, k = uniforms.shape
+    n = pool.shape[0]
+    n_community = community.shape[0]
+    cards_needed = 5 - n_community
+
+    # Partial shuffles leave deck a permutation of pool, so it can be reused
+    deck = pool.copy()
+    cards = np.empty(7, dtype=np.uint8)
+    cards[2:2 + n_community] = community
+
+    wins = 0
+    for s in range(sims):
+        for i in range(k):
+            j = i + int(uniforms[s, i] * (n - i))
+            deck[i], deck[j] = deck[j], deck[i]
+
+        cards[2 + n_community:] = deck[:cards_needed]
+
+        cards[0] = hand[0]
+        cards[1] = hand[1]
+        our_rank = eval7(cards)
+
+        won = 1
+        for o in range(opponents):
+            cards[0] = deck[cards_needed + 2 * o]
+            cards[1] = deck[cards_needed + 2 * o + 1]
+            if eval7(cards) > our_rank:
+                won = 0
+                break
+        wins += won
+
+    return wins
@@ -1,6 +1,34 @@
+import math
 import random
 from poker_engine.utils import eval_hand
 
+_RANK = {"2": 2, "3": 3, "4": 4, "5": 5, "6": 6, "7": 7, "8": 8, "9": 9,
+         "10": 10, "J": 11, "Q": 12, "K": 13, "A": 14}
+
+
+def _chen_score(high, low, suited):
+    """Bill Chen's preflop score for two hole cards (high >= low)"""
+    score = {14: 10, 13: 8, 12: 7, 11: 6}.get(high, high / 2)
+    if high == low:
+        return max(5, score * 2)
+    if suited:
+        score += 2
+    gap = high - low - 1
+    score -= (0, 1, 2, 4)[gap] if gap < 4 else 5
+    if gap <= 1 and high < 12:
+        score += 1
+    return math.ceil(score)
+
+
+# Preflop strength of all 169 starting hands on the 1-10 scale used for made
+# hands, keyed by (high rank, low rank, suited)
+_PREFLOP = {
+    (high, low, suited): max(1, min(10, math.ceil(_chen_score(high, low, suited) / 2)))
+    for high in range(2, 15)
+    for low in range(2, high + 1)
+    for suited in ((False,) if high == low else (False, True))
+}
+
 
 class HeuristicAI:
     """
@@ -22,6 +50,7 @@ class HeuristicAI:
           - stage: preflop / flop / turn / river
           - community_cards: list[str]
           - players: list of player dicts
+          - self_index: the bot's own index in players
           - pot, current_bet, to_call
         """
 
@@ -31,9 +60,10 @@ class HeuristicAI:
 
         # Extract the bot's own hand
         players = state.get("players", [])
-        bot = next((p for p in players if p["name"] == self.name), None)
-        if not bot:
+        self_index = state.get("self_index")
+        if self_index is None:
             return {"move": "fold", "raise_amount": 0}
+        bot = players[self_index]
 
         hand = bot.get("hand", [])
         community = state.get("community_cards", [])
@@ -50,12 +80,9 @@ class HeuristicAI:
         # Handle preflop or invalid rank
         if rank is None:
             if hand: 
-                high_card_values = {"2": 2, "3": 3, "4": 4, "5": 5, "6": 6,
-                                    "7": 7, "8": 8, "9": 9, "10": 10,
-                                    "J": 11, "Q": 12, "K": 13, "A": 14}
-                values = [high_card_values.get(c[:-1], 0) for c in hand]  # c like 'AH' or '10S'
-                avg_val = sum(values) / len(values)
-                rank = max(1, int(avg_val / 1.5)) 
+                high, low = sorted((_RANK[hand[0][:-1]], _RANK[hand[1][:-1]]), reverse=True)  # c like 'Ah' or '10s'
+                suited = high != low and hand[0][-1] == hand[1][-1]
+                rank = _PREFLOP[(high, low, suited)]
             else:
                 rank = 5  
         normalized_rank = min(rank / 10.0, 1.0)
@@ -1,7 +1,10 @@
+import logging
 from .card import Deck
 from .player import Player
 from .utils import eval_hand
 
+logger = logging.getLogger(__name__)
+
 class PokerGame:
     def __init__(self, player_names):
         self.players = [Player(name) for name in player_names]
@@ -21,6 +24,9 @@ class PokerGame:
         self.players_to_act = set()
         self.player_order = []
         self.action_index = 0
+        # Bumped whenever the turn may change, so async callers can tell
+        # whether a decision computed for an earlier state is stale
+        self.turn = 0
         
         # Lobby state
         self.lobby_timer = 15
@@ -54,7 +60,7 @@ class PokerGame:
 
     def setup_betting_round(self):
         """API addition: Initialize betting round and set current player"""
-        print(f"DEBUG: Setting up betting round for stage: {self.stage}")
+        logger.debug("Setting up betting round for stage: %s", self.stage)
         
         if self.stage == "preflop":
             if len([p for p in self.players if p.name]) == 2:  # Only count active players
@@ -77,16 +83,16 @@ class PokerGame:
                 self.player_order.append(idx)
     
         self.action_index = 0
-        print(f"DEBUG: Players to act: {self.players_to_act}, Player order: {self.player_order}")
+        logger.debug("Players to act: %s, Player order: %s", self.players_to_act, self.player_order)
         self.advance_to_next_player()
 
 
     def advance_to_next_player(self):
-        print(f"DEBUG: Advancing to next player. Players to act: {self.players_to_act}")
+        logger.debug("Advancing to next player. Players to act: %s", self.players_to_act)
 
         # If no players to act, advance stage
         if not self.players_to_act:
-            print("DEBUG: No players to act, advancing stage")
+            logger.debug("No players to act, advancing stage")
             self.advance_stage()
             return
 
@@ -99,7 +105,7 @@ class PokerGame:
             p_idx = self.player_order[self.action_index]
             p = self.players[p_idx]
 
-            print(f"DEBUG: Checking player {p_idx} ({p.name}), in players_to_act: {p_idx in self.players_to_act}, folded: {p.folded}, chips: {p.chips}")
+            logger.debug("Checking player %s (%s), in players_to_act: %s, folded: %s, chips: %s", p_idx, p.name, p_idx in self.players_to_act, p.folded, p.chips)
 
             if p_idx not in self.players_to_act:
                 self.action_index += 1
@@ -118,11 +124,11 @@ class PokerGame:
             
             # Found a player who can act
             self.current_player_index = p_idx
-            print(f"DEBUG: Set current player to {p_idx} ({p.name})")
+            logger.debug("Set current player to %s (%s)", p_idx, p.name)
             return  # This return should be the last statement in the method
 
         # If we get here, no valid player found
-        print("DEBUG: No valid player found, advancing stage")
+        logger.debug("No valid player found, advancing stage")
         self.current_player_index = None
         self.advance_stage()
 
@@ -193,6 +199,7 @@ class PokerGame:
         if player_index != self.current_player_index:
             return {"error": "Not this player's turn"}
         
+        self.turn += 1
         p = self.players[player_index]
         to_call = max(0, self.current_bet - p.current_bet)
 
@@ -301,6 +308,7 @@ class PokerGame:
         self.current_bet = 0
         self.game_over = False
         self.winner = None
+        self.turn += 1
         
         for p in self.players:
             p.reset_for_new_hand()
@@ -378,21 +386,21 @@ class PokerGame:
         """API addition: Return legal actions for current player"""
         # No legal actions during lobby phase
         if self.stage == "lobby":
-            print("DEBUG: In lobby phase - no legal actions")
+            logger.debug("In lobby phase - no legal actions")
             return []
 
         if self.current_player_index is None:
-            print("DEBUG: No current player - no legal actions")
+            logger.debug("No current player - no legal actions")
             return []
 
         if self.game_over:
-            print("DEBUG: Game over - no legal actions")
+            logger.debug("Game over - no legal actions")
             return []
 
         p = self.players[self.current_player_index]
         to_call = max(0, self.current_bet - p.current_bet)
 
-        print(f"DEBUG: Player {p.name}, to_call: {to_call}, chips: {p.chips}, current_bet: {p.current_bet}, game_bet: {self.current_bet}")
+        logger.debug("Player %s, to_call: %s, chips: %s, current_bet: %s, game_bet: %s", p.name, to_call, p.chips, p.current_bet, self.current_bet)
 
         actions = []
         if to_call == 0:
@@ -405,10 +413,11 @@ class PokerGame:
         if to_call < p.chips:
             actions.append("raise")
 
-        print(f"DEBUG: Legal actions for {p.name}: {actions}")
+        logger.debug("Legal actions for %s: %s", p.name, actions)
         return actions
     
-    def get_game_state(self, viewer_name=None):
+    def get_game_state_base(self):
+        """Game state with every hole card masked, shared by all viewers"""
         current_player = None
         to_call = 0
 
@@ -420,16 +429,9 @@ class PokerGame:
         players_state = []
         for p in self.players:
             hand = []
-            # Only show cards if game is active and not in lobby
-            if self.stage != "lobby":
-                if viewer_name is None or p.name == viewer_name:
-                    hand = [str(c) for c in p.hand]  # show full hand
-                elif not p.folded:
-                    hand = ["??", "??"]  # hide opponents' cards
-                else:
-                    hand = []  # folded players have no visible cards
-            else:
-                hand = []
+            # Only show card backs if game is active and not in lobby
+            if self.stage != "lobby" and not p.folded:
+                hand = ["??", "??"]  # hide cards; folded players have no visible cards
 
             players_state.append({
                 "name": p.name,
@@ -438,7 +440,6 @@ class PokerGame:
                 "current_bet": p.current_bet,
                 "folded": p.folded
             })
-        print(f"[GET_STATE] viewer_name={viewer_name}")
         return {
             "stage": self.stage,
             "pot": self.pot,
@@ -454,4 +455,26 @@ class PokerGame:
             "players": players_state,
             "lobby_timer": getattr(self, 'lobby_timer', None),
             "game_starting": getattr(self, 'game_starting', False)
-        }
\ No newline at end of file
+        }
+
+    def personalize_state(self, base, viewer_name=None):
+        """
+        Return a copy of a get_game_state_base() result with the hole cards
+        viewer_name may see filled in. Spectators (None) see every hand.
+        Only the patched player entries are copied; the rest is shared with base.
+        """
+        if self.stage == "lobby":
+            return base
+
+        players_state = base["players"].copy()
+        for i, p in enumerate(self.players):
+            if viewer_name is None or p.name == viewer_name:
+                players_state[i] = {**players_state[i], "hand": [str(c) for c in p.hand]}
+
+        state = base.copy()
+        state["players"] = players_state
+        return state
+
+    def get_game_state(self, viewer_name=None):
+        logger.debug("[GET_STATE] viewer_name=%s", viewer_name)
+        return self.personalize_state(self.get_game_state_base(), viewer_name)
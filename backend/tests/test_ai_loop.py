@@ -0,0 +1,122 @@
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+import main
+
+
+class FakeAI:
+    """Stands in for MonteCarloAI; the first decision blocks until released"""
+
+    calls = []
+    first_started = None
+    release = None
+
+    def __init__(self, name="Bot", simulations=0):
+        self.name = name
+
+    def decide(self, state):
+        FakeAI.calls.append(self.name)
+        if len(FakeAI.calls) == 1:
+            FakeAI.first_started.set()
+            FakeAI.release.wait(timeout=10)
+            return {"move": "fold", "raise_amount": 0}
+        move = "call" if "call" in state["legal_actions"] else "check"
+        return {"move": move, "raise_amount": 0}
+
+
+@pytest.fixture
+def fake_ai(monkeypatch):
+    FakeAI.calls = []
+    FakeAI.first_started = threading.Event()
+    FakeAI.release = threading.Event()
+    monkeypatch.setattr(main, "MonteCarloAI", FakeAI)
+    monkeypatch.setattr(main.random, "uniform", lambda a, b: 0)
+    yield FakeAI
+    FakeAI.release.set()
+
+
+async def _start_game(client):
+    """Alice in seat 0 and two bots; Alice is first to act"""
+    game_id = (await client.post("/create_game", json={"player_names": [], "seat_count": 3})).json()["game_id"]
+    await client.post(f"/join_seat/{game_id}", json={"player_name": "Alice", "seat_index": 0})
+    await client.post(f"/add_ai_player/{game_id}", json={"seat_index": 1, "ai_name": "Robo"})
+    await client.post(f"/add_ai_player/{game_id}", json={"seat_index": 2, "ai_name": "Bob"})
+    state = (await client.post(f"/start_hand/{game_id}")).json()["state"]
+    assert state["current_player_index"] == 0
+    return game_id
+
+
+def _run(test):
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await test(client)
+
+    asyncio.run(run())
+
+
+def test_stale_decision_is_discarded_after_new_hand(fake_ai):
+    async def test(client):
+        game_id = await _start_game(client)
+        game = main.games[game_id]
+
+        first = asyncio.create_task(
+            client.post(f"/action/{game_id}", json={"player_index": 0, "action": "call"})
+        )
+        while not fake_ai.first_started.is_set():
+            await asyncio.sleep(0.01)
+
+        # Robo's fold is still being decided; start over so Robo is to act again
+        await client.post(f"/start_hand/{game_id}")
+        second = await client.post(f"/action/{game_id}", json={"player_index": 0, "action": "call"})
+        assert game.current_player_index == 1
+
+        fake_ai.release.set()
+        messages = (await first).json()["messages"]
+
+        assert not game.players[1].folded
+        assert not any("fold" in m for m in messages)
+        assert fake_ai.calls[:2] == ["Robo", "Robo"]
+        assert second.json()["messages"] == ["Alice chose call"]
+        await client.delete(f"/game/{game_id}")
+
+    _run(test)
+
+
+def test_only_one_request_drives_bot_turns(fake_ai):
+    async def test(client):
+        game_id = await _start_game(client)
+        fake_ai.release.set()
+
+        responses = await asyncio.gather(
+            client.post(f"/action/{game_id}", json={"player_index": 0, "action": "call"}),
+            client.post(f"/action/{game_id}", json={"player_index": 0, "action": "call"}),
+        )
+        bot_messages = [r.json()["messages"][1:] for r in responses]
+
+        assert sorted(map(bool, bot_messages)) == [False, True]
+        assert len(fake_ai.calls) == len(bot_messages[0] + bot_messages[1])
+        assert not main.games[game_id].ai_running
+        await client.delete(f"/game/{game_id}")
+
+    _run(test)
+
+
+def test_failed_broadcast_releases_ai_loop(fake_ai, monkeypatch):
+    async def failing_broadcast(game_id, game):
+        raise RuntimeError("broadcast failed")
+
+    async def test(client):
+        game_id = await _start_game(client)
+        monkeypatch.setattr(main.manager, "broadcast", failing_broadcast)
+
+        with pytest.raises(RuntimeError):
+            await client.post(f"/action/{game_id}", json={"player_index": 0, "action": "call"})
+
+        assert not main.games[game_id].ai_running
+        await client.delete(f"/game/{game_id}")
+
+    _run(test)
@@ -0,0 +1,73 @@
+import random
+
+import numpy as np
+
+from poker_engine.card import Card, Deck
+from poker_engine.fast_eval import card_id, eval7
+from poker_engine.monte_carlo_ai import MonteCarloAI
+from poker_engine.utils import eval_hand
+
+
+def _cards(spec):
+    """Parse a space separated hand like 'Ah 10s 2c' into Card objects"""
+    return [Card(c[:-1], c[-1]) for c in spec.split()]
+
+
+def _score(cards):
+    return eval7(np.array([card_id(c) for c in cards], dtype=np.uint8))
+
+
+def _sign(x):
+    return (x > 0) - (x < 0)
+
+
+def _assert_same_order(a, b):
+    ref_a, _ = eval_hand(a)
+    ref_b, _ = eval_hand(b)
+    expected = (ref_a > ref_b) - (ref_a < ref_b)
+    assert _sign(_score(a) - _score(b)) == expected, (a, b, ref_a, ref_b)
+
+
+def test_eval7_matches_eval_hand_on_random_pairs():
+    rng = random.Random(1234)
+    for _ in range(2000):
+        cards = Deck().cards
+        rng.shuffle(cards)
+        _assert_same_order(cards[:7], cards[7:14])
+
+
+def test_eval7_wheel_straight():
+    wheel = _cards("Ah 2c 3d 4s 5h 9c Kd")
+    six_high = _cards("6h 2c 3d 4s 5h 9c Kd")
+    trips = _cards("Ah Ac Ad 4s 5h 9c Kd")
+    _assert_same_order(wheel, six_high)
+    _assert_same_order(wheel, trips)
+
+
+def test_eval7_straight_flush_beats_flush():
+    straight_flush = _cards("5h 6h 7h 8h 9h 2c 3d")
+    ace_flush = _cards("Ah Kh Qh Jh 9h 2c 3d")
+    _assert_same_order(straight_flush, ace_flush)
+
+
+def test_eval7_two_trips_make_a_full_house():
+    two_trips = _cards("Kh Kc Kd 7s 7h 7c 2d")
+    kings_full_of_queens = _cards("Kh Kc Kd Qs Qh 3c 2d")
+    _assert_same_order(two_trips, kings_full_of_queens)
+    assert eval_hand(two_trips)[0][0] == 7
+
+
+def test_eval7_third_pair_can_be_two_pair_kicker():
+    third_pair_kicker = _cards("Ah Ac Kd Ks Qh Qc 2d")
+    jack_kicker = _cards("Ah Ac Kd Ks Jh 3c 2d")
+    _assert_same_order(third_pair_kicker, jack_kicker)
+
+
+def test_est_win_pocket_aces_heads_up():
+    ai = MonteCarloAI(simulations=20000)
+    assert abs(ai.estWin(["Ah", "As"], [], opponents=1) - 0.85) < 0.02
+
+
+def test_est_win_nuts_on_river():
+    ai = MonteCarloAI(simulations=500)
+    assert ai.estWin(["Ah", "Kh"], ["Qh", "Jh", "10h", "2c", "3d"], opponents=3) == 1.0
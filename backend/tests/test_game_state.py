@@ -0,0 +1,63 @@
+import copy
+
+from poker_engine.poker_engine_api import PokerGame
+
+
+def _hands(state):
+    return [p["hand"] for p in state["players"]]
+
+
+def _dealt_game():
+    """Alice, Bob and Carol in a hand where Alice (first to act) has folded"""
+    game = PokerGame(["Alice", "Bob", "Carol"])
+    game.play_hand()
+    assert game.execute_action(0, "fold")["success"]
+    return game
+
+
+def _cards(game, i):
+    return [str(c) for c in game.players[i].hand]
+
+
+def test_spectator_sees_every_hand():
+    game = _dealt_game()
+
+    state = game.get_game_state(viewer_name=None)
+
+    assert _hands(state) == [_cards(game, 0), _cards(game, 1), _cards(game, 2)]
+
+
+def test_seated_viewer_sees_only_own_hand():
+    game = _dealt_game()
+
+    state = game.get_game_state(viewer_name="Bob")
+
+    # Alice folded, so her cards are not even shown as backs
+    assert _hands(state) == [[], _cards(game, 1), ["??", "??"]]
+
+
+def test_folded_viewer_still_sees_own_hand():
+    game = _dealt_game()
+
+    state = game.get_game_state(viewer_name="Alice")
+
+    assert _hands(state) == [_cards(game, 0), ["??", "??"], ["??", "??"]]
+
+
+def test_lobby_shows_no_hands():
+    game = PokerGame(["Alice", "Bob", ""])
+
+    for viewer in (None, "Alice", "Bob"):
+        assert _hands(game.get_game_state(viewer_name=viewer)) == [[], [], []]
+
+
+def test_personalize_state_does_not_mutate_base():
+    game = _dealt_game()
+    base = game.get_game_state_base()
+    snapshot = copy.deepcopy(base)
+
+    views = [game.personalize_state(base, viewer) for viewer in (None, "Alice", "Bob", "Carol")]
+
+    assert base == snapshot
+    assert _hands(base) == [[], ["??", "??"], ["??", "??"]]
+    assert _hands(views[3]) == [[], ["??", "??"], _cards(game, 2)]
@@ -0,0 +1,123 @@
+import asyncio
+import json
+
+from ws_manager import OUTBOX_SIZE, ConnectionManager
+
+
+class FakeWebSocket:
+    """Records sent frames; can be made to block or fail on send"""
+
+    def __init__(self, stuck=False, fail=False):
+        self.sent = []
+        self.closed = False
+        self.stuck = stuck
+        self.fail = fail
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data):
+        if self.fail:
+            raise ConnectionError("socket is gone")
+        if self.stuck:
+            await asyncio.Event().wait()
+        self.sent.append(json.loads(data))
+
+    async def send_bytes(self, data):
+        await self.send_text(data.decode())
+
+    async def close(self):
+        self.closed = True
+
+
+async def _drain():
+    """Let writer tasks and scheduled closes run"""
+    for _ in range(200):
+        await asyncio.sleep(0)
+
+
+def _disconnect_all(manager):
+    """Stop the writers, as websocket_endpoint does when a client leaves"""
+    for ws, conn_state in list(manager.ws_to_state.items()):
+        manager.disconnect(conn_state.game_id, ws)
+
+
+def _state(n):
+    return {"type": "state_update", "state": {"n": n}}
+
+
+def test_newer_state_update_supersedes_queued_one():
+    async def run():
+        manager = ConnectionManager()
+        ws = FakeWebSocket()
+        await manager.connect("g", ws)
+
+        # Nothing is sent until the writer gets to run, so all three are queued
+        await manager.send_personal_message(ws, _state(1))
+        await manager.send_personal_message(ws, {"type": "pong"})
+        await manager.send_personal_message(ws, _state(2))
+        await _drain()
+
+        assert ws.sent == [{"type": "pong"}, _state(2)]
+        _disconnect_all(manager)
+
+    asyncio.run(run())
+
+
+def test_non_state_messages_are_never_dropped():
+    async def run():
+        manager = ConnectionManager()
+        ws = FakeWebSocket()
+        await manager.connect("g", ws)
+
+        ticks = [{"type": "lobby_tick", "timer": t} for t in range(OUTBOX_SIZE - 1)]
+        for n, tick in enumerate(ticks):
+            await manager.broadcast_raw("g", tick)
+            await manager.send_personal_message(ws, _state(n))
+        await _drain()
+
+        assert ws.sent == ticks + [_state(len(ticks) - 1)]
+        assert manager.get_connection_state(ws) is not None
+        _disconnect_all(manager)
+
+    asyncio.run(run())
+
+
+def test_full_outbox_drops_only_the_slow_connection():
+    async def run():
+        manager = ConnectionManager()
+        slow = FakeWebSocket(stuck=True)
+        healthy = FakeWebSocket()
+        await manager.connect("g", slow)
+        await manager.connect("g", healthy)
+
+        ticks = [{"type": "lobby_tick", "timer": t} for t in range(OUTBOX_SIZE * 2)]
+        for tick in ticks:
+            await manager.broadcast_raw("g", tick)
+            await _drain()
+        await manager.broadcast("g", _state(1))
+        await _drain()
+
+        assert slow.closed
+        assert manager.get_connection_state(slow) is None
+        assert [c.ws for c in manager.game_connections["g"]] == [healthy]
+        assert healthy.sent == ticks + [_state(1)]
+        _disconnect_all(manager)
+
+    asyncio.run(run())
+
+
+def test_writer_send_failure_closes_and_removes_connection():
+    async def run():
+        manager = ConnectionManager()
+        ws = FakeWebSocket(fail=True)
+        await manager.connect("g", ws)
+
+        await manager.broadcast("g", _state(1))
+        await _drain()
+
+        assert ws.closed
+        assert manager.get_connection_state(ws) is None
+        assert "g" not in manager.game_connections
+
+    asyncio.run(run())
@@ -1,28 +1,71 @@
 # ws_manager.py
 from fastapi import WebSocket
-from typing import Dict, Optional
+from typing import Dict, Optional, Union
+from collections import deque
+import asyncio
 import json
+import logging
+import zlib
+import orjson
+
+try:
+    import msgpack
+except ImportError:  # optional: only needed for ?wire=msgpack
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait on a single client before treating it as dead
+SEND_TIMEOUT = 2.0
+# Outbound messages buffered per connection before it is considered stuck
+OUTBOX_SIZE = 32
+# zlib level for payloads compressed once and shared by many connections
+COMPRESS_LEVEL = 1
+# Seconds a scheduled broadcast waits for further updates to merge with
+BROADCAST_DELAY = 0.01
+
+# Wire formats a client can request with ?wire=...
+WIRE_FORMATS = ("json", "msgpack") if msgpack is not None else ("json",)
+
+def dumps(message) -> str:
+    """Serialize an outgoing WebSocket message with orjson"""
+    return orjson.dumps(message).decode()
+
+def encode(message, wire: str = "json") -> Union[str, bytes]:
+    """Serialize a message for a wire format: JSON text or msgpack bytes"""
+    if wire == "msgpack":
+        return msgpack.packb(message, use_bin_type=True)
+    return dumps(message)
 
 class ConnectionState:
     """Represents the state of a single WebSocket connection"""
-    def __init__(self, websocket: WebSocket, connection_id: str):
+    def __init__(self, websocket: WebSocket, connection_id: str, compress: bool = False, wire: str = "json"):
         self.ws = websocket
         self.connection_id = connection_id
+        # Client accepts zlib-compressed payloads as binary frames (JSON wire only,
+        # so a binary frame is never ambiguous between zlib and msgpack)
+        self.compress = compress and wire == "json"
+        self.wire = wire  # "json" (text frames) or "msgpack" (binary frames)
         self.role = "spectator"  # "spectator" or "player"
         self.player_name: Optional[str] = None
         self.game_id: Optional[str] = None
         self.seat_index: Optional[int] = None
+        # Outbound (is_state, payload) pairs, drained by a dedicated writer task
+        self.outbox: deque[tuple[bool, Union[str, bytes]]] = deque()
+        self.outbox_ready = asyncio.Event()
+        self.writer_task: Optional[asyncio.Task] = None
+        self.closed = False
     
     def upgrade_to_player(self, player_name: str, seat_index: int):
         """Upgrade this connection from spectator to player"""
         self.role = "player"
         self.player_name = player_name
         self.seat_index = seat_index
-        print(f"[WS] Connection {self.connection_id} upgraded to player: {player_name} at seat {seat_index}")
+        logger.debug("[WS] Connection %s upgraded to player: %s at seat %s", self.connection_id, player_name, seat_index)
     
     def downgrade_to_spectator(self):
         """Downgrade player back to spectator"""
-        print(f"[WS] Player {self.player_name} downgraded to spectator")
+        logger.debug("[WS] Player %s downgraded to spectator", self.player_name)
         self.role = "spectator"
         self.player_name = None
         self.seat_index = None
@@ -37,28 +80,29 @@ class ConnectionState:
 
 class ConnectionManager:
     def __init__(self):
-        # Map of game_id -> list of ConnectionState objects
-        self.game_connections: Dict[str, list[ConnectionState]] = {}
+        # Map of game_id -> set of ConnectionState objects
+        self.game_connections: Dict[str, set[ConnectionState]] = {}
         # Map of websocket -> ConnectionState for quick lookups
         self.ws_to_state: Dict[WebSocket, ConnectionState] = {}
         self.connection_counter = 0
+        # Map of game_id -> timer for a scheduled (coalesced) broadcast
+        self._pending: Dict[str, asyncio.TimerHandle] = {}
 
-    async def connect(self, game_id: str, websocket: WebSocket) -> ConnectionState:
+    async def connect(self, game_id: str, websocket: WebSocket, compress: bool = False, wire: str = "json") -> ConnectionState:
         """Accept a new WebSocket connection"""
         await websocket.accept()
         
         # Create connection state
         self.connection_counter += 1
-        conn_state = ConnectionState(websocket, f"conn_{self.connection_counter}")
+        conn_state = ConnectionState(websocket, f"conn_{self.connection_counter}", compress=compress, wire=wire)
         conn_state.game_id = game_id
         
         # Store in our maps
-        if game_id not in self.game_connections:
-            self.game_connections[game_id] = []
-        self.game_connections[game_id].append(conn_state)
+        self.game_connections.setdefault(game_id, set()).add(conn_state)
         self.ws_to_state[websocket] = conn_state
+        conn_state.writer_task = asyncio.create_task(self._writer(conn_state))
         
-        print(f"[WS CONNECT] game={game_id} conn_id={conn_state.connection_id} total_connections={len(self.game_connections[game_id])}")
+        logger.debug("[WS CONNECT] game=%s conn_id=%s total_connections=%s", game_id, conn_state.connection_id, len(self.game_connections[game_id]))
         return conn_state
 
     def disconnect(self, game_id: str, websocket: WebSocket):
@@ -67,13 +111,21 @@ class ConnectionManager:
         if not conn_state:
             return
         
-        if game_id in self.game_connections:
-            if conn_state in self.game_connections[game_id]:
-                self.game_connections[game_id].remove(conn_state)
-                print(f"[WS DISCONNECT] game={game_id} player={conn_state.player_name} conn_id={conn_state.connection_id}")
+        connections = self.game_connections.get(game_id)
+        if connections is not None:
+            connections.discard(conn_state)
+            if not connections:
+                del self.game_connections[game_id]
+        logger.debug("[WS DISCONNECT] game=%s player=%s conn_id=%s", game_id, conn_state.player_name, conn_state.connection_id)
         
-        if websocket in self.ws_to_state:
-            del self.ws_to_state[websocket]
+        del self.ws_to_state[websocket]
+        
+        # Cancelling alone is not enough: wait_for can swallow a cancellation
+        # that races a completed send, so the writer also checks closed
+        conn_state.closed = True
+        conn_state.outbox_ready.set()
+        if conn_state.writer_task and conn_state.writer_task is not asyncio.current_task():
+            conn_state.writer_task.cancel()
     
     def get_connection_state(self, websocket: WebSocket) -> Optional[ConnectionState]:
         """Get the connection state for a websocket"""
@@ -97,47 +149,170 @@ class ConnectionManager:
         conn_state.downgrade_to_spectator()
         return True
     
-    async def send_personal_message(self, websocket: WebSocket, message: dict):
-        """Send a message to a specific connection"""
+    async def _writer(self, conn_state: ConnectionState):
+        """Drain a connection's outbox, dropping and closing the connection on failure"""
+        outbox = conn_state.outbox
         try:
-            await websocket.send_json(message)
+            while not conn_state.closed:
+                if not outbox:
+                    conn_state.outbox_ready.clear()
+                    await conn_state.outbox_ready.wait()
+                    continue
+                
+                _, payload = outbox.popleft()
+                if isinstance(payload, bytes):
+                    send = conn_state.ws.send_bytes(payload)
+                else:
+                    send = conn_state.ws.send_text(payload)
+                await asyncio.wait_for(send, timeout=SEND_TIMEOUT)
+        except asyncio.CancelledError:
+            pass
         except Exception as e:
-            print(f"[WS ERROR] Failed to send personal message: {e}")
+            logger.warning("[WS ERROR] Removing closed connection %s: %s", conn_state.connection_id, e)
+            self.disconnect(conn_state.game_id, conn_state.ws)
+            await self._close(conn_state)
+    
+    async def _close(self, conn_state: ConnectionState):
+        """Best-effort close so the client notices and reconnects"""
+        try:
+            await asyncio.wait_for(conn_state.ws.close(), timeout=SEND_TIMEOUT)
+        except Exception:
+            pass
+    
+    def _enqueue(self, conn_state: ConnectionState, payload: Union[str, bytes], is_state: bool = False):
+        """
+        Queue a message for a connection without waiting on the network.
+        A state_update is a full snapshot, so it supersedes any state_update
+        still waiting in the outbox; other messages are always delivered.
+        """
+        outbox = conn_state.outbox
+        if is_state:
+            for i, (queued_is_state, _) in enumerate(outbox):
+                if queued_is_state:
+                    del outbox[i]
+                    break
+        
+        if len(outbox) >= OUTBOX_SIZE:
+            # Too far behind on messages that cannot be dropped: make the client reconnect
+            logger.warning("[WS WARN] Outbox full, dropping slow connection %s", conn_state.connection_id)
+            self.disconnect(conn_state.game_id, conn_state.ws)
+            asyncio.create_task(self._close(conn_state))
+            return
+        
+        outbox.append((is_state, payload))
+        conn_state.outbox_ready.set()
+    
+    async def send_personal_message(self, websocket: WebSocket, message: dict):
+        """Send a message to a specific connection"""
+        conn_state = self.ws_to_state.get(websocket)
+        if not conn_state:
+            logger.warning("[WS ERROR] Failed to send personal message: unknown connection")
+            return
+        
+        self._enqueue(conn_state, encode(message, conn_state.wire), is_state=message.get("type") == "state_update")
+    
+    def schedule_broadcast(self, game_id: str, game_state_obj, delay: float = BROADCAST_DELAY):
+        """
+        Broadcast game state after a short delay.
+        A request made while one is pending replaces it, so a burst of
+        updates (e.g. several seats filled at once in the lobby) goes out as
+        a single broadcast.
+        """
+        pending = self._pending.pop(game_id, None)
+        if pending:
+            pending.cancel()
+        
+        loop = asyncio.get_running_loop()
+        self._pending[game_id] = loop.call_later(delay, self._flush_broadcast, game_id, game_state_obj)
+    
+    def _flush_broadcast(self, game_id: str, game_state_obj):
+        self._pending.pop(game_id, None)
+        self._broadcast_now(game_id, game_state_obj)
     
     async def broadcast(self, game_id: str, game_state_obj):
+        """
+        Broadcast game state to all connections in a game immediately.
+        Supersedes any broadcast scheduled for the same game.
+        """
+        pending = self._pending.pop(game_id, None)
+        if pending:
+            pending.cancel()
+        
+        self._broadcast_now(game_id, game_state_obj)
+    
+    async def broadcast_raw(self, game_id: str, message: dict):
+        """
+        Send a small message that is the same for every viewer (e.g. a lobby
+        tick) to all connections in a game, encoded once per wire format.
+        Unlike broadcast, no game state is built and a scheduled broadcast
+        is left pending.
+        """
+        payloads: Dict[str, Union[str, bytes]] = {}
+        # Iterate over a copy: _enqueue may disconnect a slow connection
+        for conn_state in list(self.game_connections.get(game_id, ())):
+            payload = payloads.get(conn_state.wire)
+            if payload is None:
+                payload = encode(message, conn_state.wire)
+                payloads[conn_state.wire] = payload
+            self._enqueue(conn_state, payload)
+    
+    def _broadcast_now(self, game_id: str, game_state_obj):
         """
         Broadcast game state to all connections in a game.
         Each connection receives personalized state based on their role.
+        The shared state is built once and each distinct view only patches in
+        the hole cards it may see; each view is encoded once per wire format,
+        then queued for every connection that sees it; the per-connection
+        writers do the sending. The shared spectator view is also compressed
+        once for clients that opted in; personalized player views are sent
+        uncompressed.
         """
-        connections = self.game_connections.get(game_id, [])
-        remove_list = []
+        # A copy, since _enqueue may disconnect a slow connection mid-loop
+        connections = list(self.game_connections.get(game_id, ()))
         
         is_game_object = hasattr(game_state_obj, "get_game_state")
         
-        print(f"[BCAST] game_id={game_id} is_game_object={is_game_object} connections={len(connections)}")
+        logger.debug("[BCAST] game_id=%s is_game_object=%s connections=%s", game_id, is_game_object, len(connections))
+        
+        # State shared by every view; each view only patches in hole cards
+        base = None
+        # Map of viewer_name -> message (None is the spectator view)
+        messages: Dict[Optional[str], dict] = {}
+        # Map of (viewer_name, wire) -> encoded message
+        payloads: Dict[tuple, Union[str, bytes]] = {}
+        # Map of wire -> compressed spectator message
+        compressed: Dict[str, bytes] = {}
         
         for conn_state in connections:
-            try:
-                # Get personalized game state based on connection's role
+            # If player, show their cards. If spectator, hide all cards.
+            viewer_name = conn_state.player_name if conn_state.is_player() and is_game_object else None
+            
+            message = messages.get(viewer_name)
+            if message is None:
                 if is_game_object:
-                    # If player, show their cards. If spectator, hide all cards.
-                    viewer_name = conn_state.player_name if conn_state.is_player() else None
-                    personalized_state = game_state_obj.get_game_state(viewer_name=viewer_name)
-                    
+                    if base is None:
+                        base = game_state_obj.get_game_state_base()
                     message = {
                         "type": "state_update",
-                        "state": personalized_state
+                        "state": game_state_obj.personalize_state(base, viewer_name)
                     }
                 else:
                     message = game_state_obj
-                
-                await conn_state.ws.send_json(message)
-                print(f"[BCAST SENT] to={conn_state.player_name or 'spectator'} conn_id={conn_state.connection_id} role={conn_state.role}")
+                messages[viewer_name] = message
             
-            except Exception as e:
-                print(f"[WS ERROR] Removing closed connection {conn_state.connection_id}: {e}")
-                remove_list.append(conn_state)
-        
-        # Clean up dead connections
-        for conn_state in remove_list:
-            self.disconnect(game_id, conn_state.ws)
\ No newline at end of file
+            is_state = message.get("type") == "state_update"
+            key = (viewer_name, conn_state.wire)
+            payload = payloads.get(key)
+            if payload is None:
+                payload = encode(message, conn_state.wire)
+                payloads[key] = payload
+            
+            if conn_state.compress and viewer_name is None:
+                packed = compressed.get(conn_state.wire)
+                if packed is None:
+                    raw = payload.encode() if isinstance(payload, str) else payload
+                    packed = zlib.compress(raw, COMPRESS_LEVEL)
+                    compressed[conn_state.wire] = packed
+                self._enqueue(conn_state, packed, is_state=is_state)
+            else:
+                self._enqueue(conn_state, payload, is_state=is_state)
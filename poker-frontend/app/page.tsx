@@ -257,6 +257,15 @@ export default function PokerTable() {
           setLobbyTimer(state.lobby_timer);
         }
       }
+    } else if (msg.type === "lobby_tick") {
+      // Countdown-only update: patch the timer into the last full state
+      const { timer, game_starting } = msg;
+      if (typeof timer === "number") {
+        setLobbyTimer(timer);
+        setGameState((prev) =>
+          prev ? { ...prev, lobby_timer: timer, game_starting: game_starting ?? false } : prev
+        );
+      }
     } else if (msg.type === "upgrade_success") {
       console.log("[CLIENT] Successfully upgraded to player");
       if (msg.state) {
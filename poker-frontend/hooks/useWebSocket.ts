@@ -1,9 +1,11 @@
 import { useEffect, useRef, useState, useCallback } from "react";
 
 export type WSMessage<T> = {
-  type: "state_update" | "upgrade_success" | "upgrade_failed" | "pong";
+  type: "state_update" | "upgrade_success" | "upgrade_failed" | "pong" | "lobby_tick";
   state?: T;
   error?: string;
+  timer?: number;
+  game_starting?: boolean;
 };
 
 export function useReliableWebSocket<T>(
@@ -106,7 +108,8 @@ export function useReliableWebSocket<T>(
         if (parsed?.type === "state_update" || 
             parsed?.type === "upgrade_success" || 
             parsed?.type === "upgrade_failed" ||
-            parsed?.type === "pong") {
+            parsed?.type === "pong" ||
+            parsed?.type === "lobby_tick") {
           onMessage(parsed);
         }
       } catch (err) {